@@ -0,0 +1,64 @@
+"""A board represents all the cells of the puzzle by one Processing image.
+
+Each cell is one pixel of the image, and the whole image is scaled up to the
+canvas in a single draw call.
+"""
+
+
+def hex_to_argb(clr):
+    """Pack a hex color code into an opaque ARGB integer.
+
+    Args:
+        clr: hex color code, like "#FFFFFF".
+
+    Returns:
+        a signed 32-bit integer, as Processing stores its pixels.
+    """
+    # the alpha byte is always 0xFF, so the value always overflows 31 bits
+    return (0xFF000000 | int(clr.lstrip('#'), 16)) - (1 << 32)
+
+
+class Board(object):
+    """A board has a size, the width of its cells, and the color of each cell.
+
+    Args:
+        m: number of rows.
+        n: number of columns.
+        w: width of a cell.
+        clr: color of the cells, initially white.
+    """
+    def __init__(self, m, n, w, clr="#FFFFFF"):
+        self.m = m
+        self.n = n
+        self.w = w
+        # cache of the packed colors, the puzzle only uses a few of them
+        self.argb = {}
+        # [row * n + col] is the packed color of the cell
+        self.colors = [self.to_argb(clr)] * (m * n)
+        # created by the first show(), Processing must be running by then
+        self.img = None
+
+    def to_argb(self, clr):
+        """Get the packed color of a hex color code"""
+        argb = self.argb.get(clr)
+        if argb is None:
+            argb = hex_to_argb(clr)
+            self.argb[clr] = argb
+        return argb
+
+    def show(self):
+        """Display all the cells to View"""
+        if self.img is None:
+            self.img = createImage(self.n, self.m, RGB)
+        self.img.loadPixels()
+        pixels = self.img.pixels
+        for i, argb in enumerate(self.colors):
+            pixels[i] = argb
+        self.img.updatePixels()
+        # each pixel is scaled to a sharp square cell, as long as the sketch
+        # calls noSmooth() in setup()
+        image(self.img, 0, 0, self.n * self.w, self.m * self.w)
+
+    def update_color(self, row, col, clr):
+        """Mutator of the color of the cell at row and col"""
+        self.colors[row * self.n + col] = self.to_argb(clr)
@@ -2,8 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import sys
-from bs4 import BeautifulSoup
-from selenium import webdriver
+import requests
+from lxml import etree
+from lxml import html as lxml_html
 
 """Web-crawl Nonogram puzzles from https://www.nonograms.org/
 
@@ -25,74 +26,129 @@ TODO:
 """
 
 
-def crawl_color_panel(soup: BeautifulSoup) -> dict:
+def _style_color(style: str) -> str:
+    """The color of a cell, the value of the first declaration of its style
+    attribute, "background-color:#RRGGBB;..."."""
+    return style.partition(':')[2].partition(';')[0]
+
+
+def _first_with_class(tag: str, name: str) -> str:
+    """XPath of the first tag element having a certain class."""
+    return (f'(//{tag}[contains(concat(" ", normalize-space(@class), " "), '
+            f'" {name} ")])[1]')
+
+
+_COLOR_PANEL_XPATH = etree.XPath(
+    _first_with_class('table', 'nonogram_color_table'))
+_ROW_GROUPS_XPATH = etree.XPath(_first_with_class('td', 'nmtl'))
+_COL_GROUPS_XPATH = etree.XPath(_first_with_class('td', 'nmtt'))
+
+
+def _find_section(tree: lxml_html.HtmlElement,
+                  xpath: etree.XPath,
+                  name: str) -> lxml_html.HtmlElement:
+    """ Fetches a section of the puzzle page.
+
+    Args:
+        tree: the root element of the puzzle page parsed by lxml.
+        xpath: one of the compiled XPath of the sections above.
+        name: name of the section, for the error message.
+
+    Returns:
+        the element of the section.
+
+    Raises:
+        ValueError: the page has no such section, it is not a color puzzle
+            page (e.g. a black-white puzzle or a "not found" page).
+    """
+    found = xpath(tree)
+    if not found:
+        raise ValueError(f'the page has no {name}, is it a color puzzle?')
+    return found[0]
+
+
+def crawl_color_panel(tree: lxml_html.HtmlElement) -> dict:
     """ Fetches the color panel of the puzzle.
 
     Args:
-        soup: a Beautiful Soup object in html.parser.
+        tree: the root element of the puzzle page parsed by lxml.
     Returns:
         a dictionary, where key is hexadecimal color codeand value is the ID
         of the color.
+
+    Raises:
+        ValueError: the color panel is missing or empty.
     """
-    color_panel_ele = soup.find('table', {'class': 'nonogram_color_table'})
-    colors = color_panel_ele.findAll('td')
+    section = _find_section(tree, _COLOR_PANEL_XPATH, 'color panel')
     color_panel = {'#ffffff': 0}  # initial with the white color
-    for i, color in enumerate(colors, start=1):
-        color_panel[color['style'].split(';')[0].split(':')[1]] = i
+    for i, style in enumerate(section.xpath('.//td/@style'), start=1):
+        color_panel[_style_color(style)] = i
+    if len(color_panel) == 1:
+        raise ValueError('the color panel of the page is empty')
     return color_panel
 
 
-def crawl_row_groups(soup: BeautifulSoup, color_panel: dict) -> list:
+def crawl_row_groups(tree: lxml_html.HtmlElement, color_panel: dict) -> list:
     """ Fetches the row groups of the puzzle.
 
     Args:
-        soup: a Beautiful Soup object in html.parser.
+        tree: the root element of the puzzle page parsed by lxml.
         color_panel: a dictionary generates by crawl_color_panel().
 
     Returns:
         a list of tuples (block_length, color_id).
+
+    Raises:
+        ValueError: the row groups are missing or empty.
     """
-    rows_ele = soup.find('td', {'class': 'nmtl'}).findAll('tr')
+    section = _find_section(tree, _ROW_GROUPS_XPATH, 'row groups')
     row_groups = []
-    for row in rows_ele:
+    for row in section.xpath('.//tr'):
         cur_row = []
-        for cell in row.findAll('td'):
+        for cell in row.xpath('.//td'):
+            style = cell.get('style')
             # empty cell
-            if not cell.has_attr('style'):
+            if style is None:
                 continue
-            cell_color = cell['style'].split(';')[0].split(':')[1]
-            cur_row.append((int(cell.text), color_panel[cell_color]))
+            cell_color = _style_color(style)
+            cur_row.append((int(cell.text_content()), color_panel[cell_color]))
         row_groups.append(cur_row)
+    if not row_groups:
+        raise ValueError('the row groups of the page are empty')
     return row_groups
 
 
-def crawl_col_groups(soup: BeautifulSoup, color_panel: dict) -> list:
+def crawl_col_groups(tree: lxml_html.HtmlElement, color_panel: dict) -> list:
     """ Fetches the column groups of the puzzle.
 
     Args:
-        soup: a Beautiful Soup object in html.parser.
+        tree: the root element of the puzzle page parsed by lxml.
         color_panel: a dictionary generates by crawl_color_panel().
 
     Returns:
         a list of tuples (block_length, color_id).
+
+    Raises:
+        ValueError: the column groups are missing or empty.
     """
-    cols_ele = soup.find('td', {'class': 'nmtt'}).findAll('tr')
-    temp_col_groups = []
-    for row in cols_ele:
-        cur_row = []
-        for cell in row.findAll('td'):
-            # empty cell, place a dummy value first
-            if not cell.has_attr('style'):
-                cur_row.append((-1, 0))
-            else:
-                cell_color = cell['style'].split(';')[0].split(':')[1]
-                cur_row.append((int(cell.text), color_panel[cell_color]))
-        temp_col_groups.append(cur_row)
-    # we collect column groups like row groups first, from left to right and
-    # top to bottom. However, the actual column group is actually the transpose
-    # of the temp_col_groups.
-    return [[(i, j) for i, j in col if i * j != 0]
-            for col in zip(*temp_col_groups)]
+    section = _find_section(tree, _COL_GROUPS_XPATH, 'column groups')
+    col_groups = []
+    for row in section.xpath('.//tr'):
+        # the groups are laid out top to bottom, each row holds the next
+        # group of every column, or an empty cell if a column has no more
+        for col_idx, cell in enumerate(row.xpath('.//td')):
+            if col_idx == len(col_groups):
+                col_groups.append([])
+            style = cell.get('style')
+            # empty cell
+            if style is None:
+                continue
+            cell_color = _style_color(style)
+            col_groups[col_idx].append((int(cell.text_content()),
+                                        color_panel[cell_color]))
+    if not col_groups:
+        raise ValueError('the column groups of the page are empty')
+    return col_groups
 
 
 def main():
@@ -105,36 +161,30 @@ def main():
     argv = sys.argv
     puzzle_id = argv[1]
 
-    opt = webdriver.ChromeOptions()
-    opt.add_argument('headless')
-
-    driver = webdriver.Chrome(options=opt)
+    # the puzzle page is static, no need to render it in a browser
     puzzle_url = 'https://www.nonograms.org/nonograms2/i/'
-    driver.get(puzzle_url + puzzle_id)
-
-    driver.get(puzzle_url + puzzle_id)
-    soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-    color_panel = crawl_color_panel(soup)
-    row_groups = crawl_row_groups(soup, color_panel)
-    col_groups = crawl_col_groups(soup, color_panel)
+    response = requests.get(puzzle_url + puzzle_id,
+                            headers={'User-Agent': 'Mozilla/5.0'},
+                            timeout=10)
+    response.raise_for_status()
+    tree = lxml_html.fromstring(response.content)
+
+    # crawl everything before opening the file, so a page that fails to
+    # parse never overwrites a saved puzzle
+    color_panel = crawl_color_panel(tree)
+    row_groups = crawl_row_groups(tree, color_panel)
+    col_groups = crawl_col_groups(tree, color_panel)
+
+    parts = [f'{k}\n' for k in color_panel]
+    parts.append('-\n')
+    parts.extend(''.join(f'{color_id}:{size},' for color_id, size in row_group)
+                 + '\n' for row_group in row_groups)
+    parts.append('-\n')
+    parts.extend(''.join(f'{color_id}:{size},' for color_id, size in col_group)
+                 + '\n' for col_group in col_groups)
 
     with open(f'./puzzle/{puzzle_id}.txt', 'w', encoding='UTF-8') as file:
-        for k in color_panel:
-            file.write(f'{k}\n')
-        file.write('-\n')
-
-        for row_group in row_groups:
-            for color_id, size in row_group:
-                file.write(f'{color_id}:{size},')
-            file.write('\n')
-
-        file.write('-\n')
-
-        for col_group in col_groups:
-            for color_id, size in col_group:
-                file.write(f'{color_id}:{size},')
-            file.write('\n')
+        file.write(''.join(parts))
 
 
 if __name__ == '__main__':
@@ -5,143 +5,305 @@
 groups description and current state. Each cell is represented by an integer.
 It potentially has color i if the i-th bit is set to 1.
 
+Internally, the line is transposed into one integer bit-mask per color, where
+the i-th bit is set to 1 if the i-th cell can potentially have that color.
+The DP runs on whole rows of states at once, each row is also an integer
+bit-mask, see can_fill().
+
 Example:
-    solver = OneLineSolver(10)
+    solver = OneLineSolver()
 """
 
+# the most line states remembered by a solver before it starts over
+SOLVED_CACHE_SIZE = 100000
 
-class OneLineSolver:
-    """Use top-down dynamic programming (DP) techniques to solve one line of
-    the Nonogram puzzle. Initlaize the memorization lists for DP.
+
+def flood_down(seeds, through):
+    """Extend each set bit of seeds toward bit 0, for as long as the bits it
+    moves onto are set in through. Each round doubles the length of the runs
+    it crosses, so a whole line takes a logarithmic number of rounds.
 
     Args:
-        line_len: the size of the line.
+        seeds: integer bit-mask, the bits to extend.
+        through: integer bit-mask, the bits a seed can be extended onto.
+
+    Returns:
+        the extended bit-mask.
     """
-    def __init__(self, line_len):
-        # save the last update_state() call count, when the [X][Y] element
-        # was calculated, and protects from recalculations
-        self.cache = [[0] * (line_len + 1) for _ in range(line_len + 1)]
-        # [X][Y] memorize if it's possible to reach the end of the puzzle,
-        # if we have placed X groups and currently on the Y-th cell.
-        self.calc_fill = [[0] * (line_len + 1) for _ in range(line_len + 1)]
-        # manage recalculations, increments when update_state() is called
-        self.cache_cnt = 0
-        # save intermediate results (bit-masks) before updating the cells list
-        self.result_cell = [0] * line_len
-
-    def update_state(self, groups, cells):
+    shift = 1
+    while through and seeds >> shift:
+        seeds |= through & (seeds >> shift)
+        through &= through >> shift
+        shift <<= 1
+    return seeds
+
+
+def flood_up(seeds, through):
+    """Same as flood_down(), but extend each set bit of seeds toward the
+    higher bits.
+    """
+    shift = 1
+    while through:
+        grown = seeds | (through & (seeds << shift))
+        if grown == seeds:
+            break
+        seeds = grown
+        through &= through << shift
+        shift <<= 1
+    return seeds
+
+
+def spread(starts, size):
+    """Set the size bits that begin at every set bit of starts.
+
+    Args:
+        starts: integer bit-mask, the first bit of each run.
+        size: positive integer, the length of the runs.
+
+    Returns:
+        the bit-mask of the runs.
+    """
+    span = 1
+    while span << 1 <= size:
+        starts |= starts << span
+        span <<= 1
+    return starts | (starts << (size - span))
+
+
+def starts_within(allowed, size):
+    """Find the bits where a run of size set bits of allowed begins.
+
+    Args:
+        allowed: integer bit-mask.
+        size: positive integer, the length of the runs.
+
+    Returns:
+        the bit-mask of the first bits of the runs.
+    """
+    span = 1
+    while span << 1 <= size:
+        allowed &= allowed >> span
+        span <<= 1
+    return allowed & (allowed >> (size - span))
+
+
+class OneLineSolver:
+    """Use bottom-up dynamic programming (DP) techniques to solve one line of
+    the Nonogram puzzle. The DP states of a group over all the cells are
+    packed in one integer bit-mask. The same solver can be used for both
+    rows and columns.
+    """
+    def __init__(self):
+        # [C] is a bit-mask of the cells that can potentially have color C
+        self.possible = []
+        # save intermediate results (bit-masks per color) before updating the
+        # cells list
+        self.result_mask = []
+        # the layout() of the groups of the current line
+        self.group_layout = None
+        # [(sizes, colors, line_len)] the layout() of every line solved so
+        # far, a line keeps its groups through all the solving steps
+        self.layouts = {}
+        # [((sizes, colors, line_len), tuple(cells))] the state update_state()
+        # returned for a line state, or None if it was unsolvable. The
+        # returned states are remembered too, solving them again would not
+        # change them.
+        self.solved = {}
+
+    def update_state(self, sizes, colors, cells):
         """Update the state of a line. Return false if the puzzle is unsolvable
-        or has wrong state, otherwise return true.
+        or has wrong state, otherwise return true. A line left unchanged since
+        it was last updated, or in a state already solved, is not solved
+        again.
 
         Args:
-            groups: list of tuples, the groups description of the line.
+            sizes: tuple of integers, the sizes of the groups of the line.
+            colors: tuple of integers, the colors of the groups of the line.
             cells: list of integers, the state of the line.
 
         Returns:
             False if the puzzle is unsolvable or finished. Otherwise, True.
         """
-        self.cache_cnt += 1
-        self.result_cell = [0] * len(cells)
-        if not self.can_fill(groups, cells):
+        key = (sizes, colors, len(cells))
+        state = (key, tuple(cells))
+        if state in self.solved:
+            result = self.solved[state]
+            if result is None:
+                return False
+            cells[:] = result
+            return True
+        group_layout = self.layouts.get(key)
+        if group_layout is None:
+            group_layout = self.layout(sizes, colors, len(cells))
+            self.layouts[key] = group_layout
+        self.group_layout = group_layout
+        # colors of the groups that no cell can have stay all zero bit-masks
+        num_colors = group_layout[2]
+        for cell in cells:
+            num_colors = max(num_colors, cell.bit_length())
+        # one pass over the cells, visits only the set bits of each cell
+        possible = [0] * num_colors
+        for i, cell in enumerate(cells):
+            while cell:
+                lowest = cell & -cell
+                possible[lowest.bit_length() - 1] |= 1 << i
+                cell ^= lowest
+        self.possible = possible
+        result_mask = [0] * num_colors
+        self.result_mask = result_mask
+        if not self.can_fill(sizes, colors, cells):
+            self.remember(state, None)
             return False
-        for i, _ in enumerate(cells):
-            cells[i] = self.result_cell[i]
+        # transpose back, visits only the set bits of each color
+        cells[:] = [0] * len(cells)
+        for clr, mask in enumerate(result_mask):
+            bit = 1 << clr
+            while mask:
+                lowest = mask & -mask
+                cells[lowest.bit_length() - 1] |= bit
+                mask ^= lowest
+        result = tuple(cells)
+        self.remember(state, result)
+        self.remember((key, result), result)
         return True
 
-    @staticmethod
-    def can_place_color(cells, clr, l_bound, r_bound):
-        """Determines the possibility of filling the cells in an intervals,
-        inclusive with a certain color.
+    def remember(self, state, result):
+        """Save the result of a line state, the cache is emptied once it holds
+        SOLVED_CACHE_SIZE states.
 
         Args:
-            cells: list of integers, the state of the line
-            clr: color
-            l_bound: integer, left bound of the interval
-            r_bound: integer, right bound of the interval
+            state: a tuple ((sizes, colors, line_len), tuple(cells)).
+            result: a tuple of integers, or None if it was unsolvable.
 
         Returns:
-            True if possible, False otherwise.
+            None
         """
-        if r_bound >= len(cells):
-            return False
-        mask = 1 << clr
-        # Paint a block of cells with a certain color iff it is possible for
-        # all cells to have this color (every cell from the block has color-th
-        # bit set to 1).
-        for i in range(l_bound, r_bound + 1):
-            if (cells[i] & mask) == 0:
-                return False
-        return True
+        if len(self.solved) >= SOLVED_CACHE_SIZE:
+            self.solved.clear()
+        self.solved[state] = result
 
-    def set_place_color(self, clr, l_bound, r_bound):
-        """Filling the cells in an intervals , inclusive with a certain color.
+    def layout(self, sizes, colors, line_len):
+        """Precompute what can_fill() needs from the groups description of a
+        line. It only depends on the groups and the size of the line, not on
+        the state of the line.
 
         Args:
-            clr: color
-            l_bound: integer, left bound of the interval
-            r_bound: integer, right boun dof the interval
+            sizes: tuple of integers, the sizes of the groups of the line.
+            colors: tuple of integers, the colors of the groups of the line.
+            line_len: the size of the line.
 
         Returns:
-            None
+            a tuple (steps, need, num_colors, forced). steps[X] is the size
+            of the X-th group plus the white cell that must follow it, if any.
+            need is the fewest cells needed to place all the groups.
+            num_colors is one more than the largest color of the groups. If
+            the groups leave no room to move, forced is the only solution of
+            the line as one bit-mask per color, otherwise None.
         """
-        for i in range(l_bound, r_bound + 1):
-            self.result_cell[i] |= (1 << clr)
+        groups_len = len(sizes)
+        steps = []
+        for cur_group in range(groups_len):
+            size = sizes[cur_group]
+            # same color group should separate by a white cell
+            if cur_group + 1 < groups_len and \
+                    colors[cur_group + 1] == colors[cur_group]:
+                steps.append(size + 1)
+            else:
+                steps.append(size)
+        num_colors = max([1] + [clr + 1 for clr in colors])
+        need = sum(steps)
+        forced = None
+        if need == line_len or not sizes:
+            forced = [0] * num_colors
+            cur_cell = 0
+            for cur_group in range(groups_len):
+                size = sizes[cur_group]
+                forced[colors[cur_group]] |= ((1 << size) - 1) << cur_cell
+                if steps[cur_group] > size:
+                    forced[0] |= 1 << (cur_cell + size)
+                cur_cell += steps[cur_group]
+            # no group at all, every cell is white
+            forced[0] |= ((1 << line_len) - 1) >> cur_cell << cur_cell
+        return steps, need, num_colors, forced
+
+    def can_fill(self, sizes, colors, cells):
+        """Check if it's possible to reach the end of the puzzle from its
+        beginning, and fill every cell that some solution passes through.
 
-    def can_fill(self, groups, cells, cur_group=0, cur_cell=0):
-        """Check if it's possible to reach the end of the puzzle, if we have
-        placed cur_group from groups and currenlty are on the cur_cell from
-        cells.
+        The DP state (X, Y) means we have placed X groups and currently are on
+        the Y-th cell; the Y-th bit of a row of states is set for the states
+        of the X-th group that pass the check. From a state, we either place a
+        white cell or the X-th group. A run of whites is walked at once with
+        flood_down() and flood_up(), instead of one cell at a time.
 
         Args:
-            groups: a list of tuples, the group description of the line
+            sizes: tuple of integers, the sizes of the groups of the line.
+            colors: tuple of integers, the colors of the groups of the line.
             cells: a list of integer, state of the line.
-            cur_group: integer, index of the current group we are looking
-            cur_cell: integer, index of the current cell we are looking
 
         Returns:
             0 (False) if we cannot fill, 1 (True) otherwise
         """
-        # at the end of the puzzle, all the groups should have been placed
-        if cur_cell == len(cells):
-            return cur_group == len(groups)
-        if self.cache[cur_group][cur_cell] == self.cache_cnt:
-            return self.calc_fill[cur_group][cur_cell]
-        answer = 0
-        # try to place a white cell
-        if self.can_place_color(cells, 0, cur_cell, cur_cell) and \
-                self.can_fill(groups, cells, cur_group, cur_cell + 1):
-            self.set_place_color(0, cur_cell, cur_cell)  # fill white
-            answer = 1
-        # try to place current-group-color cells
-        if cur_group < len(groups):
-            cur_color = groups[cur_group][1]
-            l_bound = cur_cell
-            r_bound = cur_cell + groups[cur_group][0] - 1
-
-            can_place = self.can_place_color(cells, cur_color, l_bound, r_bound)
-            # it may be required to place a white cell after current group
-            place_white = False
-
-            next_cell = r_bound + 1
-            # check whether we are to put a white cell after the group
-            if can_place:
-                # same color group should sepaprate by a white cell
-                if cur_group + 1 < len(groups) and \
-                        groups[cur_group + 1][1] == cur_color:
-                    place_white = True
-                    can_place = self.can_place_color(cells,
-                                                     0,
-                                                     next_cell,
-                                                     next_cell)
-                    next_cell += 1
-            if can_place:
-                # remember this if after placement the puzzle can be solved
-                if self.can_fill(groups, cells, cur_group + 1, next_cell):
-                    answer = 1
-                    self.set_place_color(cur_color, l_bound, r_bound)
-                    if place_white:
-                        self.set_place_color(0, r_bound + 1, r_bound + 1)
-        # memorization
-        self.calc_fill[cur_group][cur_cell] = answer
-        self.cache[cur_group][cur_cell] = self.cache_cnt
-        return answer
+        line_len = len(cells)
+        groups_len = len(sizes)
+        possible = self.possible
+        result_mask = self.result_mask
+        steps, need, _, forced = self.group_layout
+        if need > line_len:
+            return 0
+        if forced is not None:
+            # the only solution must still be possible
+            for clr, mask in enumerate(forced):
+                if possible[clr] & mask != mask:
+                    return 0
+            for clr, mask in enumerate(forced):
+                result_mask[clr] |= mask
+            return 1
+        whites = possible[0]
+        # [X] the cells the X-th group can start from, including the white
+        # cell that must follow it. Groups of the same size and color share
+        # the same windows, they are only searched once.
+        starts = []
+        windows = {}
+        for cur_group in range(groups_len):
+            size = sizes[cur_group]
+            clr = colors[cur_group]
+            start = windows.get((size, clr))
+            if start is None:
+                start = starts_within(possible[clr], size)
+                windows[(size, clr)] = start
+            if steps[cur_group] > size:
+                start &= whites >> size
+            starts.append(start)
+
+        # [X] the states that can reach the end of the puzzle, filled from the
+        # last group to the first one. At the end of the puzzle, all the
+        # groups should have been placed.
+        fill = [0] * (groups_len + 1)
+        fill[groups_len] = flood_down(1 << line_len, whites)
+        for cur_group in range(groups_len - 1, -1, -1):
+            placed = starts[cur_group] & \
+                (fill[cur_group + 1] >> steps[cur_group])
+            fill[cur_group] = flood_down(placed, whites)
+        if not fill[0] & 1:
+            return 0
+
+        # walk forward from (0, 0), along the states that reach the end
+        reached = 1
+        for cur_group in range(groups_len + 1):
+            cur_fill = fill[cur_group]
+            # place white cells, the next state must reach the end too
+            reached = flood_up(reached, (whites << 1) & cur_fill)
+            result_mask[0] |= reached & whites & (cur_fill >> 1)
+            if cur_group == groups_len:
+                break
+            # place the current group
+            step = steps[cur_group]
+            placed = reached & starts[cur_group] & \
+                (fill[cur_group + 1] >> step)
+            size = sizes[cur_group]
+            result_mask[colors[cur_group]] |= spread(placed, size)
+            if step > size:
+                result_mask[0] |= placed << size
+            reached = placed << step
+        return 1
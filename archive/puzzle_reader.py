@@ -12,6 +12,11 @@ and column groups.
     reader = PuzzleReader('19048')
 """
 
+import re
+
+# a group is written as "S:C," in the input file
+GROUP_PATTERN = re.compile(r'(\d+):(\d+)')
+
 
 class PuzzleReader:
     """Unparse a text file of a puzzle.
@@ -67,14 +72,19 @@ class PuzzleReader:
             token: a string of either row groups or column groups
 
         Returns:
-            a list of integer tuples (S, C), represent the group has sizs S
-            with color ID C.
+            a tuple (sizes, colors, offsets). The groups of all the lines are
+            flattened, the I-th group has size sizes[I] with color ID
+            colors[I]. The groups of the L-th line are the ones from
+            offsets[L] to offsets[L + 1], exclusive.
         """
-        ans = []
-        for row in token.strip().split('\n'):
-            cur = []
-            for group in row.strip(',').split(','):
-                size, clr = map(int, group.split(':'))
-                cur.append((size, clr))
-            ans.append(cur)
-        return ans
+        sizes = []
+        colors = []
+        offsets = [0]
+        # the first line is the end of the '-' separator line. A line
+        # without groups is an empty line, it must not be stripped away.
+        for row in token.splitlines()[1:]:
+            for size, clr in GROUP_PATTERN.findall(row):
+                sizes.append(int(size))
+                colors.append(int(clr))
+            offsets.append(len(sizes))
+        return tuple(sizes), tuple(colors), offsets